@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+B4 Dashboard Per-Assignee Aggregation
+Shared story points rule and per-person/per-week rollups of JIRA issues,
+used by both team velocity and workload.
+"""
+
+from datetime import date
+
+# Story points field (customfield_10124 is what the board displays)
+STORY_POINTS_FIELD = 'customfield_10124'
+DEFAULT_STORY_POINTS = 2  # Default story points if not set
+
+HIGH_PRIORITIES = ('P1 - High', 'Highest')
+
+
+def _number(value):
+    """Return value as int when it is whole, so JSON shows 3 rather than 3.0."""
+    value = float(value)
+    return int(value) if value.is_integer() else value
+
+
+def get_story_points(fields):
+    """Story points of an issue, using the default if not set."""
+    points = fields.get(STORY_POINTS_FIELD)
+    return _number(points) if points else DEFAULT_STORY_POINTS
+
+
+def week_index(day, first_week_start, num_weeks):
+    """Index of the week containing day (a 'YYYY-MM-DD...' string), or -1."""
+    if not day:
+        return -1
+    days = (date.fromisoformat(day[:10]) - first_week_start).days
+    index = days // 7
+    return index if days >= 0 and index < num_weeks else -1
+
+
+def aggregate(rows, num_weeks=0):
+    """Roll up story points per assignee and per week in a single pass.
+
+    rows is an iterable of (fields, week) pairs: week is the index of the week
+    the issue was resolved in, or None for an open issue. Raises ValueError if
+    a resolved issue's week is outside 0..num_weeks-1.
+
+    Returns {'people': {name: {'in_progress', 'todo', 'high_priority',
+    'resolved', 'weeks'}}, 'week_totals': [...]}.
+    """
+    people = {}
+    week_totals = [0] * num_weeks
+
+    for fields, week in rows:
+        assignee = fields.get('assignee')
+        name = assignee.get('displayName', 'Unassigned') if assignee else 'Unassigned'
+        points = get_story_points(fields)
+
+        person = people.get(name)
+        if person is None:
+            person = people[name] = {'in_progress': 0, 'todo': 0, 'high_priority': 0,
+                                     'resolved': 0, 'weeks': [0] * num_weeks}
+
+        if week is not None:
+            if not 0 <= week < num_weeks:
+                raise ValueError(f'Week index {week} out of range for {num_weeks} weeks')
+            person['resolved'] += points
+            person['weeks'][week] += points
+            week_totals[week] += points
+            continue
+
+        if (fields.get('status') or {}).get('name') == 'In Progress':
+            person['in_progress'] += points
+        else:
+            person['todo'] += points
+        if (fields.get('priority') or {}).get('name', '') in HIGH_PRIORITIES:
+            person['high_priority'] += points
+
+    return {'people': people, 'week_totals': week_totals}
+
+
+def team_velocity(rollup, week_labels):
+    """Shape a rollup as {name: {'weeks': {label: points}, 'total': points}}."""
+    data = {}
+    for name, person in rollup['people'].items():
+        if not person['resolved']:
+            continue
+        data[name] = {
+            'weeks': {label: _number(points) for label, points in zip(week_labels, person['weeks']) if points},
+            'total': _number(person['resolved'])
+        }
+    return data
+
+
+def workload(rollup):
+    """Shape a rollup as {name: {'in_progress', 'todo', 'high_priority'}}."""
+    data = {}
+    for name, person in rollup['people'].items():
+        if not (person['in_progress'] or person['todo']):
+            continue
+        data[name] = {
+            'in_progress': _number(person['in_progress']),
+            'todo': _number(person['todo']),
+            'high_priority': _number(person['high_priority'])
+        }
+    return data
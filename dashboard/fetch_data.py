@@ -6,12 +6,16 @@ Pulls data from JIRA and saves as JSON for the dashboard.
 
 import json
 import os
+import time
 from datetime import datetime
 from pathlib import Path
 
 import requests
 from requests.auth import HTTPBasicAuth
 
+import aggregate
+import trends
+
 
 def get_credentials():
     """Load credentials from Claude config."""
@@ -137,7 +141,7 @@ def fetch_jira_issues(auth, jql, max_results=50):
     params = {
         'jql': jql,
         'maxResults': max_results,
-        'fields': 'summary,status,priority,assignee,created,updated,fixVersions,versions,labels,customfield_10124'
+        'fields': f'summary,status,priority,assignee,created,updated,fixVersions,versions,labels,{aggregate.STORY_POINTS_FIELD}'
     }
 
     response = requests.get(url, auth=auth, params=params)
@@ -146,6 +150,36 @@ def fetch_jira_issues(auth, jql, max_results=50):
     return []
 
 
+def fetch_all_issues(auth, jql, fields, page_size=100, retries=3):
+    """Fetch every issue matching jql, following nextPageToken pagination.
+
+    Rate-limited (429) and server error pages are retried with backoff. If a
+    page still fails, returns [] like fetch_jira_issues rather than a
+    silently truncated result.
+    """
+    url = 'https://getnexar.atlassian.net/rest/api/3/search/jql'
+    params = {'jql': jql, 'maxResults': page_size, 'fields': fields}
+
+    issues = []
+    while True:
+        for attempt in range(retries):
+            response = requests.get(url, auth=auth, params=params)
+            if response.status_code != 429 and response.status_code < 500:
+                break
+            if attempt < retries - 1:
+                time.sleep(2 ** attempt)
+        if response.status_code != 200:
+            print(f"  Warning: JIRA search failed ({response.status_code}), skipping {len(issues)} fetched issues")
+            return []
+        data = response.json()
+        issues.extend(data.get('issues', []))
+        if data.get('isLast', True) or not data.get('nextPageToken'):
+            break
+        params['nextPageToken'] = data['nextPageToken']
+
+    return issues
+
+
 def fetch_b4_bugs(auth):
     """Fetch B4 bugs from BR project."""
     jql = 'project = BR AND (summary ~ "Beam4" OR summary ~ "B4") AND status not in (Done, Closed) ORDER BY created DESC'
@@ -157,9 +191,7 @@ def fetch_b4_bugs(auth):
         # Get affected versions (version found)
         versions = fields.get('versions', [])
         version_found = versions[0].get('name', '-') if versions else '-'
-        # Get story points (default to 2 if not set)
-        sp = fields.get('customfield_10124')
-        story_points = int(sp) if sp else 2
+        story_points = aggregate.get_story_points(fields)
         bugs.append({
             'key': issue['key'],
             'summary': fields.get('summary', '')[:60],
@@ -186,9 +218,7 @@ def fetch_fs_tickets(auth):
         # Get affected versions (version discovered)
         versions = fields.get('versions', [])
         version_discovered = versions[0].get('name', '-') if versions else '-'
-        # Get story points (default to 2 if not set)
-        sp = fields.get('customfield_10124')
-        story_points = int(sp) if sp else 2
+        story_points = aggregate.get_story_points(fields)
         tickets.append({
             'key': issue['key'],
             'summary': fields.get('summary', '')[:55],
@@ -211,9 +241,7 @@ def fetch_ft_tickets(auth):
     tickets = []
     for issue in issues:
         fields = issue['fields']
-        # Get story points (default to 2 if not set)
-        sp = fields.get('customfield_10124')
-        story_points = int(sp) if sp else 2
+        story_points = aggregate.get_story_points(fields)
         tickets.append({
             'key': issue['key'],
             'summary': fields.get('summary', '')[:55],
@@ -262,15 +290,13 @@ def fetch_top_priorities(auth):
     sprint_issues = []
     url_search = 'https://getnexar.atlassian.net/rest/api/3/search/jql'
     jql = f'sprint = {active_sprint_id} AND issuetype in (Task, Story, Bug)'
-    params = {'jql': jql, 'maxResults': 200, 'fields': 'summary,status,issuetype,resolutiondate,created,labels,customfield_10124'}
+    params = {'jql': jql, 'maxResults': 200, 'fields': f'summary,status,issuetype,resolutiondate,created,labels,{aggregate.STORY_POINTS_FIELD}'}
     response = requests.get(url_search, auth=auth, params=params)
     if response.status_code == 200:
         for issue in response.json().get('issues', []):
             fields = issue['fields']
             labels = fields.get('labels', [])
-            # Get story points (default to 2 if not set)
-            sp = fields.get('customfield_10124')
-            story_points = int(sp) if sp else 2
+            story_points = aggregate.get_story_points(fields)
             sprint_issues.append({
                 'key': issue['key'],
                 'summary': fields.get('summary', '')[:60],
@@ -322,17 +348,9 @@ def fetch_velocity_data(auth, b4_only=True):
     today = datetime.now()
     url = 'https://getnexar.atlassian.net/rest/api/3/search/jql'
 
-    # Story points field (customfield_10124 is what the board displays)
-    story_points_field = 'customfield_10124'
-    default_points = 2  # Default story points if not set
-
     def sum_story_points(issues):
         """Sum story points for a list of issues, using default if not set."""
-        total = 0
-        for issue in issues:
-            points = issue['fields'].get(story_points_field)
-            total += points if points else default_points
-        return total
+        return sum(aggregate.get_story_points(issue['fields']) for issue in issues)
 
     # Get initial counts (before our 8-week window)
     first_week_start = today - timedelta(weeks=7, days=today.weekday())
@@ -342,13 +360,13 @@ def fetch_velocity_data(auth, b4_only=True):
 
     # Initial open tickets (Task, Story, Bug only - exclude New, Backlog)
     jql = f'project = FS {label_filter} AND issuetype in (Task, Story, Bug) AND status not in (Done, Closed, New, Backlog) AND created < "{first_week_start.strftime("%Y-%m-%d")}"'
-    params = {'jql': jql, 'maxResults': 200, 'fields': f'key,{story_points_field}'}
+    params = {'jql': jql, 'maxResults': 200, 'fields': f'key,{aggregate.STORY_POINTS_FIELD}'}
     response = requests.get(url, auth=auth, params=params)
     initial_open = sum_story_points(response.json().get('issues', [])) if response.status_code == 200 else 0
 
     # Initial open bugs (exclude Done, Closed, Dropped, New, Backlog)
     jql = f'project = FS {label_filter} AND issuetype = Bug AND status not in (Done, Closed, Dropped, New, Backlog) AND created < "{first_week_start.strftime("%Y-%m-%d")}"'
-    params = {'jql': jql, 'maxResults': 200, 'fields': f'key,{story_points_field}'}
+    params = {'jql': jql, 'maxResults': 200, 'fields': f'key,{aggregate.STORY_POINTS_FIELD}'}
     response = requests.get(url, auth=auth, params=params)
     initial_bugs = sum_story_points(response.json().get('issues', [])) if response.status_code == 200 else 0
 
@@ -359,25 +377,25 @@ def fetch_velocity_data(auth, b4_only=True):
 
         # Resolved tickets this week (only Task, Story, Bug)
         jql = f'project = FS {label_filter} AND issuetype in (Task, Story, Bug) AND resolutiondate >= "{week_start.strftime("%Y-%m-%d")}" AND resolutiondate <= "{week_end.strftime("%Y-%m-%d")}"'
-        params = {'jql': jql, 'maxResults': 200, 'fields': f'key,{story_points_field}'}
+        params = {'jql': jql, 'maxResults': 200, 'fields': f'key,{aggregate.STORY_POINTS_FIELD}'}
         response = requests.get(url, auth=auth, params=params)
         resolved = sum_story_points(response.json().get('issues', [])) if response.status_code == 200 else 0
 
         # Created tickets this week (only Task, Story, Bug - exclude New, Backlog)
         jql = f'project = FS {label_filter} AND issuetype in (Task, Story, Bug) AND status not in (New, Backlog) AND created >= "{week_start.strftime("%Y-%m-%d")}" AND created <= "{week_end.strftime("%Y-%m-%d")}"'
-        params = {'jql': jql, 'maxResults': 200, 'fields': f'key,{story_points_field}'}
+        params = {'jql': jql, 'maxResults': 200, 'fields': f'key,{aggregate.STORY_POINTS_FIELD}'}
         response = requests.get(url, auth=auth, params=params)
         created = sum_story_points(response.json().get('issues', [])) if response.status_code == 200 else 0
 
         # Resolved bugs this week (Done, Closed, or Dropped)
         jql = f'project = FS {label_filter} AND issuetype = Bug AND resolutiondate >= "{week_start.strftime("%Y-%m-%d")}" AND resolutiondate <= "{week_end.strftime("%Y-%m-%d")}"'
-        params = {'jql': jql, 'maxResults': 200, 'fields': f'key,{story_points_field}'}
+        params = {'jql': jql, 'maxResults': 200, 'fields': f'key,{aggregate.STORY_POINTS_FIELD}'}
         response = requests.get(url, auth=auth, params=params)
         bugs_resolved = sum_story_points(response.json().get('issues', [])) if response.status_code == 200 else 0
 
         # Created bugs this week (exclude New/Backlog - only count active bugs)
         jql = f'project = FS {label_filter} AND issuetype = Bug AND status not in (New, Backlog) AND created >= "{week_start.strftime("%Y-%m-%d")}" AND created <= "{week_end.strftime("%Y-%m-%d")}"'
-        params = {'jql': jql, 'maxResults': 200, 'fields': f'key,{story_points_field}'}
+        params = {'jql': jql, 'maxResults': 200, 'fields': f'key,{aggregate.STORY_POINTS_FIELD}'}
         response = requests.get(url, auth=auth, params=params)
         bugs_created = sum_story_points(response.json().get('issues', [])) if response.status_code == 200 else 0
 
@@ -397,76 +415,32 @@ def fetch_team_velocity(auth):
     from datetime import timedelta
 
     today = datetime.now()
-    url = 'https://getnexar.atlassian.net/rest/api/3/search/jql'
-
-    # Story points field (customfield_10124 is what the board displays)
-    story_points_field = 'customfield_10124'
-    default_points = 2  # Default story points if not set
-
-    team_velocity = {}
-    weeks_data = []
-
-    for weeks_ago in range(7, -1, -1):
-        week_start = today - timedelta(weeks=weeks_ago, days=today.weekday())
-        week_end = week_start + timedelta(days=6)
-        week_label = week_start.strftime('%m/%d')
-        weeks_data.append(week_label)
-
-        # Fetch resolved issues this week with assignee and story points
-        jql = f'project = FS AND labels = Beam4k AND issuetype in (Task, Story, Bug) AND resolutiondate >= "{week_start.strftime("%Y-%m-%d")}" AND resolutiondate <= "{week_end.strftime("%Y-%m-%d")}"'
-        params = {'jql': jql, 'maxResults': 200, 'fields': f'assignee,{story_points_field}'}
-        response = requests.get(url, auth=auth, params=params)
-
-        if response.status_code == 200:
-            for issue in response.json().get('issues', []):
-                assignee = issue['fields'].get('assignee')
-                name = assignee.get('displayName', 'Unassigned') if assignee else 'Unassigned'
-                points = issue['fields'].get(story_points_field)
-                points = points if points else default_points
+    num_weeks = 8
+    first_week_start = (today - timedelta(weeks=num_weeks - 1, days=today.weekday())).date()
+    weeks_data = [(first_week_start + timedelta(weeks=i)).strftime('%m/%d') for i in range(num_weeks)]
 
-                if name not in team_velocity:
-                    team_velocity[name] = {'weeks': {}, 'total': 0}
+    # One query for the whole window; issues are bucketed into weeks locally
+    jql = f'project = FS AND labels = Beam4k AND issuetype in (Task, Story, Bug) AND resolutiondate >= "{first_week_start.strftime("%Y-%m-%d")}"'
+    issues = fetch_all_issues(auth, jql, f'assignee,resolutiondate,{aggregate.STORY_POINTS_FIELD}')
 
-                team_velocity[name]['weeks'][week_label] = team_velocity[name]['weeks'].get(week_label, 0) + points
-                team_velocity[name]['total'] += points
+    rows = []
+    for issue in issues:
+        week = aggregate.week_index(issue['fields'].get('resolutiondate'), first_week_start, num_weeks)
+        if week >= 0:
+            rows.append((issue['fields'], week))
 
-    return {'data': team_velocity, 'weeks': weeks_data}
+    rollup = aggregate.aggregate(rows, num_weeks)
+    return {'data': aggregate.team_velocity(rollup, weeks_data), 'weeks': weeks_data}
 
 
 def fetch_workload(auth, sprint_id):
     """Fetch current workload per person based on story points (active sprint issues only)."""
-    url = 'https://getnexar.atlassian.net/rest/api/3/search/jql'
-
-    # Story points field and default
-    story_points_field = 'customfield_10124'
-    default_points = 2
-
     # Include only active sprint issues (not Done/Closed/Dropped)
     jql = f'sprint = {sprint_id} AND status not in (Done, Closed, Dropped) AND assignee is not EMPTY'
-    params = {'jql': jql, 'maxResults': 200, 'fields': f'assignee,status,priority,{story_points_field}'}
-    response = requests.get(url, auth=auth, params=params)
-
-    workload = {}
-    if response.status_code == 200:
-        for issue in response.json().get('issues', []):
-            assignee = issue['fields'].get('assignee', {}).get('displayName', 'Unknown')
-            status = issue['fields'].get('status', {}).get('name', '')
-            priority = issue['fields'].get('priority', {}).get('name', '') if issue['fields'].get('priority') else ''
-            sp = issue['fields'].get(story_points_field)
-            points = int(sp) if sp else default_points
+    issues = fetch_all_issues(auth, jql, f'assignee,status,priority,{aggregate.STORY_POINTS_FIELD}')
 
-            if assignee not in workload:
-                workload[assignee] = {'in_progress': 0, 'todo': 0, 'high_priority': 0}
-
-            if status == 'In Progress':
-                workload[assignee]['in_progress'] += points
-            else:
-                workload[assignee]['todo'] += points
-
-            if priority in ['P1 - High', 'Highest']:
-                workload[assignee]['high_priority'] += points
-
-    return workload
+    rows = [(issue['fields'], None) for issue in issues]
+    return aggregate.workload(aggregate.aggregate(rows))
 
 
 def main():
@@ -638,7 +612,16 @@ def main():
     with open(output_file, 'w') as f:
         json.dump(dashboard_data, f, indent=2)
 
+    # Append this refresh's aggregate numbers to the trend store
+    trend_metrics = trends.extract_metrics(dashboard_data)
+    try:
+        trends.append(trend_metrics)
+    except ValueError as e:
+        print(f"Warning: trend metrics not recorded: {e}")
+        trend_metrics = {}
+
     print(f"\nData saved to: {output_file}")
+    print(f"Trend metrics recorded: {len(trend_metrics)}")
     print(f"Total bugs: {len(bugs)}")
     print(f"Total tickets: {len(tickets)}")
     print(f"Total FT tickets: {len(ft_tickets)}")
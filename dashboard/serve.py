@@ -2,10 +2,14 @@
 """Robust HTTP server with threading and auto-restart capability."""
 
 import http.server
+import json
 import socketserver
 import os
 import signal
 import sys
+from urllib.parse import parse_qs, urlparse
+
+import trends
 
 PORT = 8081
 DIRECTORY = os.path.dirname(os.path.abspath(__file__))
@@ -15,6 +19,39 @@ class ThreadedHTTPServer(socketserver.ThreadingMixIn, socketserver.TCPServer):
     allow_reuse_address = True
     daemon_threads = True
 
+class DashboardHandler(http.server.SimpleHTTPRequestHandler):
+    """Serve dashboard files plus the /api/trends endpoint."""
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path == '/api/trends':
+            self.handle_trends(parse_qs(url.query))
+        else:
+            super().do_GET()
+
+    def handle_trends(self, params):
+        metric = params.get('metric', [''])[0]
+        if not metric:
+            self.send_json(200, {'metrics': trends.list_metrics()})
+            return
+
+        try:
+            range_seconds = trends.parse_range(params.get('range', [None])[0])
+            result = trends.query(metric, range_seconds)
+        except ValueError as e:
+            self.send_json(400, {'error': str(e)})
+            return
+        self.send_json(200, result)
+
+    def send_json(self, status, payload):
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('Cache-Control', 'no-store')
+        self.end_headers()
+        self.wfile.write(body)
+
 def signal_handler(sig, frame):
     print("\nShutting down server...")
     sys.exit(0)
@@ -25,7 +62,7 @@ if __name__ == "__main__":
 
     os.chdir(DIRECTORY)
 
-    handler = http.server.SimpleHTTPRequestHandler
+    handler = DashboardHandler
 
     with ThreadedHTTPServer(("", PORT), handler) as httpd:
         print(f"Serving at http://localhost:{PORT}")
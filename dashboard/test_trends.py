@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""Tests for the trend store (run: python3 -m pytest dashboard/)."""
+
+import tempfile
+import unittest
+from datetime import datetime
+from pathlib import Path
+
+import trends
+from trends import DAY, HOUR
+
+
+def _series(root, metric, resolution):
+    width = trends.RAW_FIELDS if resolution == 'raw' else trends.ROLLUP_FIELDS
+    records, _ = trends._load(Path(root) / metric / f'{resolution}.bin', width)
+    return [list(records[i:i + width]) for i in range(0, len(records), width)]
+
+
+class TrendStoreTest(unittest.TestCase):
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.root = self._tmp.name
+        # 10:00 local time, so an hour either side stays on the same local day
+        self.now = datetime(2026, 1, 5, 10, 0).timestamp()
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def test_rollup_folds_samples_into_buckets(self):
+        for offset, value in ((0, 4), (600, 2), (1200, 6), (HOUR, 1)):
+            trends.append({'total_bugs': value}, ts=self.now + offset, root=self.root)
+
+        hourly = _series(self.root, 'total_bugs', 'hourly')
+        self.assertEqual(hourly, [
+            [self.now, 3, 12, 2, 6, 6],
+            [self.now + HOUR, 1, 1, 1, 1, 1],
+        ])
+
+        midnight = datetime(2026, 1, 5).timestamp()
+        self.assertEqual(_series(self.root, 'total_bugs', 'daily'), [[midnight, 4, 13, 1, 6, 1]])
+        self.assertEqual(len(_series(self.root, 'total_bugs', 'raw')), 4)
+
+    def test_out_of_order_sample_is_rejected_before_writing(self):
+        trends.append({'a': 1, 'b': 1}, ts=self.now, root=self.root)
+        with self.assertRaises(ValueError):
+            trends.append({'b': 2, 'a': 2}, ts=self.now - 1, root=self.root)
+
+        self.assertEqual(_series(self.root, 'a', 'raw'), [[self.now, 1]])
+        self.assertEqual(_series(self.root, 'b', 'raw'), [[self.now, 1]])
+
+    def test_expire_waits_a_day_past_the_cutoff(self):
+        retention = trends.RESOLUTIONS['raw'][1]
+        start = self.now - retention - DAY
+        trends.append({'x': 1}, ts=start, root=self.root)
+        trends.append({'x': 2}, ts=start + HOUR, root=self.root)
+
+        # First sample is past the cutoff but within the one-day slack: kept
+        trends.append({'x': 3}, ts=self.now - HOUR, root=self.root)
+        self.assertEqual(len(_series(self.root, 'x', 'raw')), 3)
+
+        # Once a full day has expired, everything older than the cutoff goes
+        trends.append({'x': 4}, ts=self.now + 2 * HOUR, root=self.root)
+        self.assertEqual(_series(self.root, 'x', 'raw'), [[self.now - HOUR, 3], [self.now + 2 * HOUR, 4]])
+
+    def test_missing_status_records_zero(self):
+        data = {'metrics': {'bug_status': {'In Progress': 3, 'To Do': 1}}}
+        trends.append(trends.extract_metrics(data, root=self.root), ts=self.now, root=self.root)
+
+        data = {'metrics': {'bug_status': {'To Do': 2}}}
+        metrics = trends.extract_metrics(data, root=self.root)
+        self.assertEqual(metrics, {'bug_status.in_progress': 0, 'bug_status.to_do': 2})
+        trends.append(metrics, ts=self.now + 60, root=self.root)
+
+        result = trends.query('bug_status.in_progress', 2 * HOUR, now=self.now + 60, root=self.root)
+        self.assertEqual([p['value'] for p in result['points']], [3, 0])
+
+    def test_sprint_metrics_need_an_active_sprint(self):
+        data = {'metrics': {'total_bugs': 5}, 'workload': {}, 'priorities': [],
+                'sprint_data': {'name': None, 'issues': []}}
+        self.assertEqual(trends.extract_metrics(data, root=self.root), {'total_bugs': 5})
+
+    def test_pick_resolution_matches_retention(self):
+        self.assertEqual(trends.pick_resolution(2 * DAY), 'raw')
+        self.assertEqual(trends.pick_resolution(14 * DAY), 'raw')
+        self.assertEqual(trends.pick_resolution(15 * DAY), 'hourly')
+        self.assertEqual(trends.pick_resolution(120 * DAY), 'hourly')
+        self.assertEqual(trends.pick_resolution(121 * DAY), 'daily')
+        self.assertEqual(trends.pick_resolution(10 * 365 * DAY), 'daily')
+
+    def test_query_selects_range(self):
+        for hours in range(5):
+            trends.append({'x': hours}, ts=self.now + hours * HOUR, root=self.root)
+
+        result = trends.query('x', trends.parse_range('2h'), now=self.now + 4 * HOUR, root=self.root)
+        self.assertEqual(result['resolution'], 'raw')
+        self.assertEqual([p['value'] for p in result['points']], [2, 3, 4])
+
+    def test_invalid_metric_names_are_rejected(self):
+        for name in ('..', '.', 'a..b', '.a', 'a.', '../x', 'A'):
+            with self.assertRaises(ValueError):
+                trends.query(name, DAY, root=self.root)
+
+
+if __name__ == '__main__':
+    unittest.main()
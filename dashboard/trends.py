@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+"""
+B4 Dashboard Trend Store
+Append-only time series of per-refresh metrics, rolled up hourly and daily.
+
+Each metric lives in its own directory under data/trends/ with three files of
+packed float64 records:
+  raw.bin     (ts, value)                              - every refresh
+  hourly.bin  (bucket, count, sum, min, max, last)     - one per hour
+  daily.bin   (bucket, count, sum, min, max, last)     - one per day
+
+Daily buckets start at local midnight. raw.bin is only ever appended to;
+rollups (and expiry) rewrite the whole file via a temp file + os.replace, so
+a reader in another process never sees a half-updated record.
+"""
+
+import os
+import re
+import time
+from array import array
+from bisect import bisect_left, bisect_right
+from datetime import datetime
+from pathlib import Path
+
+TRENDS_DIR = Path(__file__).parent / 'data' / 'trends'
+
+RAW_FIELDS = 2
+ROLLUP_FIELDS = 6
+
+HOUR = 3600
+DAY = 24 * HOUR
+
+# resolution -> (bucket seconds, retention seconds)
+RESOLUTIONS = {
+    'raw': (0, 14 * DAY),
+    'hourly': (HOUR, 120 * DAY),
+    'daily': (DAY, 5 * 365 * DAY),
+}
+
+RANGE_UNITS = {'h': HOUR, 'd': DAY, 'w': 7 * DAY, 'm': 30 * DAY, 'y': 365 * DAY}
+DEFAULT_RANGE = '30d'
+
+# Cached series per file: path -> ((inode, mtime_ns, size), records, timestamps)
+_cache = {}
+
+
+def _slug(name):
+    """Make a status/assignee name safe to use inside a metric name."""
+    return re.sub(r'[^a-z0-9]+', '_', name.lower()).strip('_') or 'unknown'
+
+
+def extract_metrics(dashboard_data, root=TRENDS_DIR):
+    """Flatten the aggregate numbers of one refresh into {metric: value}."""
+    metrics = {}
+    summary = dashboard_data.get('metrics', {})
+
+    for key in ('total_bugs', 'total_tickets', 'total_ft_tickets'):
+        if key in summary:
+            metrics[key] = summary[key]
+
+    # Status counts only list statuses that are present, so record an explicit
+    # 0 for every status series already stored for the group.
+    recorded = list_metrics(root)
+    for group in ('bug_status', 'ticket_status', 'ft_status'):
+        if group not in summary:
+            continue
+        for name in recorded:
+            if name.startswith(f'{group}.'):
+                metrics[name] = 0
+        for status, count in summary.get(group, {}).items():
+            name = f'{group}.{_slug(status)}'
+            metrics[name] = metrics.get(name, 0) + count
+
+    # Workload, priorities and sprint completion all come from the active sprint;
+    # without one (or if its fetch failed) there is nothing to record.
+    sprint = dashboard_data.get('sprint_data') or {}
+    if not sprint.get('name'):
+        return metrics
+
+    # An empty workload is indistinguishable from a failed fetch; skip it
+    workload = dashboard_data.get('workload') or {}
+    if workload:
+        for key in ('in_progress', 'todo', 'high_priority'):
+            metrics[f'workload.{key}'] = sum(w.get(key, 0) for w in workload.values())
+
+    priorities = dashboard_data.get('priorities') or []
+    metrics['priorities.total'] = len(priorities)
+    metrics['priorities.p1'] = sum(1 for p in priorities if p.get('priority') == 'P1 - High')
+
+    # Sprint completion rate (story points resolved / committed)
+    issues = sprint.get('issues') or []
+    total_points = sum(i.get('story_points', 0) for i in issues)
+    if total_points:
+        done_points = sum(i.get('story_points', 0) for i in issues if i.get('resolved'))
+        metrics['sprint.completion_rate'] = round(done_points / total_points, 4)
+
+    return metrics
+
+
+def _metric_dir(metric, root):
+    if not re.fullmatch(r'[a-z0-9_]+(\.[a-z0-9_]+)*', metric):
+        raise ValueError(f'Invalid metric name: {metric!r}')
+    return Path(root) / metric
+
+
+def _load(path, width):
+    """Load a packed series, returning (records, timestamps).
+
+    Cached by (inode, mtime, size): appends change the size and rewrites
+    replace the inode. Callers must not modify the returned arrays.
+    """
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return array('d'), array('d')
+
+    key = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+    cached = _cache.get(path)
+    if cached and cached[0] == key:
+        return cached[1], cached[2]
+
+    records = array('d')
+    with open(path, 'rb') as f:
+        records.frombytes(f.read())
+    # Drop a partially written trailing record (concurrent append)
+    extra = len(records) % width
+    if extra:
+        del records[-extra:]
+    timestamps = records[0::width]
+
+    _cache[path] = (key, records, timestamps)
+    return records, timestamps
+
+
+def _write(path, records, width):
+    """Atomically replace a series file and refresh its cache entry."""
+    tmp_path = path.with_suffix('.tmp')
+    with open(tmp_path, 'wb') as f:
+        records.tofile(f)
+    os.replace(tmp_path, path)
+
+    # Inodes can be reused, so don't rely on the stat key to spot this rewrite
+    stat = os.stat(path)
+    _cache[path] = ((stat.st_ino, stat.st_mtime_ns, stat.st_size), records, records[0::width])
+
+
+def _expire(path, width, cutoff):
+    """Rewrite a series without records older than the retention cutoff.
+
+    Waits until a day's worth of records has expired so the file is only
+    rewritten about once a day rather than on every append.
+    """
+    records, timestamps = _load(path, width)
+    if not timestamps or timestamps[0] >= cutoff - DAY:
+        return
+    _write(path, records[bisect_left(timestamps, cutoff) * width:], width)
+
+
+def _bucket_start(ts, bucket_size):
+    """Start of the bucket containing ts; daily buckets start at local midnight."""
+    if bucket_size == DAY:
+        day = datetime.fromtimestamp(ts).replace(hour=0, minute=0, second=0, microsecond=0)
+        return day.timestamp()
+    return float(ts - ts % bucket_size)
+
+
+def _update_rollup(path, bucket_size, ts, value):
+    """Fold one sample into the last bucket of a rollup, or start a new one.
+
+    Samples are never older than the last bucket (append() rejects them), so
+    the file stays sorted by bucket.
+    """
+    bucket = _bucket_start(ts, bucket_size)
+    records, timestamps = _load(path, ROLLUP_FIELDS)
+    records = array('d', records)  # cached arrays are shared; work on a copy
+
+    if timestamps and timestamps[-1] == bucket:
+        _, count, total, low, high, _ = records[-ROLLUP_FIELDS:]
+        records[-ROLLUP_FIELDS:] = array('d', [bucket, count + 1, total + value,
+                                               min(low, value), max(high, value), value])
+    else:
+        records.extend([bucket, 1, value, value, value, value])
+
+    _write(path, records, ROLLUP_FIELDS)
+
+
+def append(metrics, ts=None, root=TRENDS_DIR):
+    """Append one refresh worth of metrics and update the hourly/daily rollups.
+
+    Raises ValueError, before writing anything, if ts is older than the last
+    recorded sample of any metric (series must stay sorted for bisect).
+    """
+    ts = float(ts if ts is not None else time.time())
+
+    for metric in metrics:
+        _, timestamps = _load(_metric_dir(metric, root) / 'raw.bin', RAW_FIELDS)
+        if timestamps and ts < timestamps[-1]:
+            raise ValueError(f'Sample for {metric!r} is older than its last record')
+
+    for metric, value in metrics.items():
+        metric_dir = _metric_dir(metric, root)
+        metric_dir.mkdir(parents=True, exist_ok=True)
+        value = float(value)
+
+        with open(metric_dir / 'raw.bin', 'ab') as f:
+            array('d', [ts, value]).tofile(f)
+
+        for resolution, (bucket_size, retention) in RESOLUTIONS.items():
+            path = metric_dir / f'{resolution}.bin'
+            if bucket_size:
+                _update_rollup(path, bucket_size, ts, value)
+            _expire(path, RAW_FIELDS if not bucket_size else ROLLUP_FIELDS, ts - retention)
+
+
+def list_metrics(root=TRENDS_DIR):
+    """Return the names of all recorded metrics."""
+    root = Path(root)
+    if not root.is_dir():
+        return []
+    return sorted(p.name for p in root.iterdir() if (p / 'raw.bin').exists())
+
+
+def parse_range(value):
+    """Parse a range like '24h', '7d', '4w', '6m' or '1y' into seconds."""
+    match = re.fullmatch(r'(\d+)([hdwmy])', (value or DEFAULT_RANGE).strip().lower())
+    if not match:
+        raise ValueError(f'Invalid range: {value!r} (use e.g. 24h, 7d, 4w, 6m, 1y)')
+    return int(match.group(1)) * RANGE_UNITS[match.group(2)]
+
+
+def pick_resolution(range_seconds):
+    """Choose the finest resolution whose retention still covers the range."""
+    for resolution, (_, retention) in RESOLUTIONS.items():
+        if range_seconds <= retention:
+            return resolution
+    return 'daily'
+
+
+def query(metric, range_seconds, now=None, root=TRENDS_DIR):
+    """Return the points of a metric over the last range_seconds."""
+    now = float(now if now is not None else time.time())
+    resolution = pick_resolution(range_seconds)
+    path = _metric_dir(metric, root) / f'{resolution}.bin'
+    width = RAW_FIELDS if resolution == 'raw' else ROLLUP_FIELDS
+
+    records, timestamps = _load(path, width)
+    start = bisect_left(timestamps, now - range_seconds)
+    end = bisect_right(timestamps, now)
+
+    points = []
+    for i in range(start * width, end * width, width):
+        if width == RAW_FIELDS:
+            points.append({'t': int(records[i]), 'value': records[i + 1]})
+        else:
+            count = records[i + 1]
+            points.append({
+                't': int(records[i]),
+                'value': round(records[i + 2] / count, 4),
+                'min': records[i + 3],
+                'max': records[i + 4],
+                'last': records[i + 5],
+                'count': int(count)
+            })
+
+    return {'metric': metric, 'resolution': resolution, 'points': points}